@@ -2,18 +2,101 @@
 
 from pathlib import Path
 
+import lxml.etree as ET
+import numpy as np
+import orjson
+from PIL import Image
+from flask import Flask
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
+
 # ALTO XML namespace
 ALTO_NS = {"alto": "http://www.loc.gov/standards/alto/ns-v2#"}
 
+# Fully qualified ALTO tags, for matching elements without namespace lookups
+TAG_PAGE = f"{{{ALTO_NS['alto']}}}Page"
+TAG_TEXT_BLOCK = f"{{{ALTO_NS['alto']}}}TextBlock"
+TAG_TEXT_LINE = f"{{{ALTO_NS['alto']}}}TextLine"
+TAG_STRING = f"{{{ALTO_NS['alto']}}}String"
+TAG_ILLUSTRATION = f"{{{ALTO_NS['alto']}}}Illustration"
+TAG_COMPOSED_BLOCK = f"{{{ALTO_NS['alto']}}}ComposedBlock"
+
+# JPEG 2000 resolution levels the decoder may skip; encoders write at least this many
+MAX_JP2_REDUCE = 5
+
 # Default directory for unpacked newspapers
 UNPACKED_DIR = Path("unpacked")
 
+# Seconds browsers may reuse API responses before revalidating them
+CACHE_MAX_AGE = 3600
+
+# Request threads of the waitress server, so image renders don't hold up data requests
+SERVER_THREADS = 8
+
 
 def find_newspaper_dirs(unpacked_dir: Path = UNPACKED_DIR) -> list[Path]:
     """Find all newspaper directories in the unpacked folder."""
     if not unpacked_dir.exists():
         return []
-    return [d for d in unpacked_dir.iterdir() if d.is_dir()]
+    # Hidden directories hold caches, not newspapers
+    return [d for d in unpacked_dir.iterdir() if d.is_dir() and not d.name.startswith(".")]
+
+
+def element_box(elem: ET._Element) -> tuple[int, int, int, int]:
+    """Read the (x, y, width, height) attributes of an ALTO element."""
+    return (
+        int(elem.get("HPOS", 0)),
+        int(elem.get("VPOS", 0)),
+        int(elem.get("WIDTH", 0)),
+        int(elem.get("HEIGHT", 0)),
+    )
+
+
+def parse_ints(values: list[str]) -> np.ndarray:
+    """Parse integer attribute strings in one NumPy call instead of int() per value."""
+    try:
+        parsed = np.fromstring(" ".join(values), dtype=np.int64, sep=" ")
+    except ValueError:
+        parsed = None
+    if parsed is None or len(parsed) != len(values):
+        # Malformed or empty values; let int() parse what it can and raise on the rest
+        parsed = np.array([int(value) for value in values], dtype=np.int64)
+    # Parsed wide so values beyond the int32 boxes fail loudly instead of wrapping
+    if len(parsed) and (parsed.min() < np.iinfo(np.int32).min or parsed.max() > np.iinfo(np.int32).max):
+        raise ValueError("ALTO attribute value out of 32-bit integer range")
+    return parsed.astype(np.int32)
+
+
+def reduce_level(image_size: tuple[int, int], size: tuple[int, int]) -> int:
+    """Count how many times an image can be halved while still covering size."""
+    level = 0
+    while (level < MAX_JP2_REDUCE and image_size[0] >> (level + 1) >= size[0]
+           and image_size[1] >> (level + 1) >= size[1]):
+        level += 1
+    return level
+
+
+def load_image_reduced(image_path: Path, level: int) -> Image.Image:
+    """Decode an image at about 1/2**level of its size, skipping the finer detail.
+
+    JPEG 2000 drops resolution levels and JPEG uses DCT scaling (down to 1/8),
+    so the full-resolution pixels are never decoded. Other formats, and files
+    with fewer levels than requested, decode in full.
+    """
+    with Image.open(image_path) as img:
+        if level and img.format == "JPEG2000":
+            img.reduce = level
+        elif level:
+            img.draft(img.mode, (img.width >> level, img.height >> level))
+        try:
+            img.load()
+            return img
+        except OSError:
+            if not level or img.format != "JPEG2000":
+                raise
+    with Image.open(image_path) as img:
+        img.load()
+        return img
 
 
 def find_ocr_pairs(base_dir: Path) -> list[tuple[Path, Path]]:
@@ -28,3 +111,36 @@ def find_ocr_pairs(base_dir: Path) -> list[tuple[Path, Path]]:
         if image_file.exists():
             pairs.append((xml_file, image_file))
     return pairs
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify() serializes in C."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self.dumps_bytes(obj).decode()
+
+    def dumps_bytes(self, obj) -> bytes:
+        """Serialize to UTF-8 JSON bytes, ready to be sent as a response body."""
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Skip the str round trip of the base class and send orjson's bytes directly
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype="application/json")
+
+
+def enable_compression(app: Flask):
+    """Compress API data and the viewer pages and assets; images are already compressed."""
+    app.config.update(
+        COMPRESS_MIMETYPES=[
+            "application/json", "application/octet-stream", "text/html", "text/css", "text/javascript",
+        ],
+        # Brotli where the client supports it, gzip otherwise; level 4 is still fast inline
+        COMPRESS_ALGORITHM=["br", "gzip"],
+        COMPRESS_BR_LEVEL=4,
+        COMPRESS_LEVEL=4,
+    )
+    Compress(app)
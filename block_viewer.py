@@ -1,41 +1,78 @@
 #!/usr/bin/env python3
 """Web-based viewer for individual TextBlock elements with OCR text side-by-side."""
 
+import hashlib
 import io
-import base64
+import os
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
 from dataclasses import dataclass
-import xml.etree.ElementTree as ET
+from functools import lru_cache
+from flask import Flask, render_template, jsonify, request, send_file
+import lxml.etree as ET
+import numpy as np
+from PIL import Image
+from waitress import serve
+
+from alto_utils import (
+    CACHE_MAX_AGE,
+    SERVER_THREADS,
+    TAG_PAGE,
+    TAG_STRING,
+    TAG_TEXT_BLOCK,
+    TAG_TEXT_LINE,
+    OrjsonProvider,
+    element_box,
+    enable_compression,
+    find_newspaper_dirs,
+    find_ocr_pairs,
+    load_image_reduced,
+    parse_ints,
+    reduce_level,
+)
 
-from flask import Flask, render_template, jsonify
-from PIL import Image, ImageDraw
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+enable_compression(app)
 
-from alto_utils import ALTO_NS, find_newspaper_dirs, find_ocr_pairs
+# Encoder settings per supported block image format; the crops are viewed once,
+# so favour encode speed over payload size
+BLOCK_IMAGE_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "png": {"format": "PNG", "compress_level": 1, "optimize": False},
+    "jpeg": {"format": "JPEG", "quality": 85},
+}
 
-app = Flask(__name__)
+# Block crops are padded by this many page pixels and shrunk to fit the display size
+BLOCK_PADDING = 20
+MAX_DISPLAY_SIZE = 800
 
+# Longest side of the page thumbnail that large blocks are cropped from
+THUMBNAIL_SIZE = 2000
 
-@dataclass
-class StringBox:
-    """A String element with bounding box."""
-    content: str
-    x: int
-    y: int
-    width: int
-    height: int
+# Elements parse_alto_blocks needs to see while streaming a page
+_BLOCK_TAGS = (TAG_PAGE, TAG_TEXT_BLOCK, TAG_TEXT_LINE, TAG_STRING)
 
 
-@dataclass
+@dataclass(slots=True)
 class TextLine:
-    """A TextLine element with its strings."""
+    """A TextLine element with its strings stored column-wise."""
     x: int
     y: int
     width: int
     height: int
-    strings: list[StringBox]
+    # String coordinates as views into the owning block's string_boxes
+    string_x: np.ndarray
+    string_y: np.ndarray
+    string_w: np.ndarray
+    string_h: np.ndarray
+    string_contents: list[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class TextBlock:
     """A TextBlock element with its lines."""
     id: str
@@ -44,57 +81,293 @@ class TextBlock:
     width: int
     height: int
     lines: list[TextLine]
+    # (x, y, width, height) rows of all child boxes, in ALTO units
+    line_boxes: np.ndarray
+    string_boxes: np.ndarray
+    # The block's (x, y, width, height) in image pixels, and its child boxes as
+    # (x1, y1, x2, y2) image-pixel corners relative to the block origin
+    image_box: tuple[int, int, int, int]
+    line_rects: np.ndarray
+    string_rects: np.ndarray
 
     def get_text(self) -> str:
         """Get full text content of the block."""
-        result = []
-        for line in self.lines:
-            line_text = " ".join(s.content for s in line.strings)
-            result.append(line_text)
-        return "\n".join(result)
-
-
-def parse_alto_blocks(xml_path: Path) -> tuple[list[TextBlock], int, int]:
-    """Parse ALTO XML and return TextBlocks and page dimensions."""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-
-    page = root.find(".//alto:Page", ALTO_NS)
-    page_width = int(page.get("WIDTH", 0))
-    page_height = int(page.get("HEIGHT", 0))
+        return "\n".join(" ".join(line.string_contents) for line in self.lines)
+
+
+def _release(elem: ET._Element):
+    """Free a consumed element and any earlier siblings still in the tree."""
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
+
+
+def _image_rects(boxes: np.ndarray, origin_x: int, origin_y: int,
+                 scale_x: float, scale_y: float) -> np.ndarray:
+    """Convert ALTO (x, y, width, height) rows to image-pixel corners relative to an origin."""
+    # Whole-row broadcasts and in-place updates keep this to two temporaries
+    rects = boxes - np.array([origin_x, origin_y, 0, 0], dtype=np.int32)
+    rects = (rects * np.array([scale_x, scale_y, scale_x, scale_y])).astype(np.int32)
+    rects[:, 2:] += rects[:, :2]
+    return rects
+
+
+def parse_alto_blocks(xml_path: Path, image_size: tuple[int, int] | None = None
+                      ) -> tuple[list[TextBlock], int, int]:
+    """Parse ALTO XML and return TextBlocks and page dimensions.
+
+    Streams the file in one pass: strings and lines are collected as their
+    closing tags arrive and packed into a TextBlock when the block closes.
+    Box coordinates are also converted once to pixels of an image of
+    image_size, so rendering a block needs no per-box arithmetic.
+    """
+    page_width = page_height = 0
+    parsed = []  # blocks wait for the page size, which comes last
+
+    # Children of the block currently being read
+    line_coords = []
+    line_strings = []  # (first string row, contents) per line
+    string_values = []  # flat HPOS, VPOS, WIDTH, HEIGHT strings of every String
+    contents = []
+    first = 0
+
+    for _, elem in ET.iterparse(str(xml_path), events=("end",), tag=_BLOCK_TAGS):
+        tag = elem.tag
+        if tag == TAG_STRING:
+            get = elem.get
+            contents.append(get("CONTENT", ""))
+            string_values += (get("HPOS", "0"), get("VPOS", "0"), get("WIDTH", "0"), get("HEIGHT", "0"))
+        elif tag == TAG_TEXT_LINE:
+            line_coords.append(element_box(elem))
+            line_strings.append((first, contents))
+            contents = []
+            first = len(string_values) // 4
+            _release(elem)
+        elif tag == TAG_TEXT_BLOCK:
+            line_boxes = np.array(line_coords, dtype=np.int32).reshape(-1, 4)
+            string_boxes = parse_ints(string_values).reshape(-1, 4)
+            lines = [
+                TextLine(*coords, *string_boxes[start:start + len(texts)].T, texts)
+                for coords, (start, texts) in zip(line_coords, line_strings)
+            ]
+            parsed.append((elem.get("ID", ""), element_box(elem), lines, line_boxes, string_boxes))
+            line_coords, line_strings, string_values, contents = [], [], [], []
+            first = 0
+            _release(elem)
+        else:
+            page_width = int(elem.get("WIDTH", 0))
+            page_height = int(elem.get("HEIGHT", 0))
+
+    image_width, image_height = image_size or (page_width, page_height)
+    scale_x = image_width / page_width if page_width else 1.0
+    scale_y = image_height / page_height if page_height else 1.0
 
     blocks = []
-    for block_elem in root.findall(".//alto:TextBlock", ALTO_NS):
-        lines = []
-        for line_elem in block_elem.findall("alto:TextLine", ALTO_NS):
-            strings = []
-            for string_elem in line_elem.findall("alto:String", ALTO_NS):
-                strings.append(StringBox(
-                    content=string_elem.get("CONTENT", ""),
-                    x=int(string_elem.get("HPOS", 0)),
-                    y=int(string_elem.get("VPOS", 0)),
-                    width=int(string_elem.get("WIDTH", 0)),
-                    height=int(string_elem.get("HEIGHT", 0)),
-                ))
-            lines.append(TextLine(
-                x=int(line_elem.get("HPOS", 0)),
-                y=int(line_elem.get("VPOS", 0)),
-                width=int(line_elem.get("WIDTH", 0)),
-                height=int(line_elem.get("HEIGHT", 0)),
-                strings=strings,
-            ))
+    for block_id, (x, y, width, height), lines, line_boxes, string_boxes in parsed:
         blocks.append(TextBlock(
-            id=block_elem.get("ID", ""),
-            x=int(block_elem.get("HPOS", 0)),
-            y=int(block_elem.get("VPOS", 0)),
-            width=int(block_elem.get("WIDTH", 0)),
-            height=int(block_elem.get("HEIGHT", 0)),
+            id=block_id,
+            x=x,
+            y=y,
+            width=width,
+            height=height,
             lines=lines,
+            line_boxes=line_boxes,
+            string_boxes=string_boxes,
+            image_box=(int(x * scale_x), int(y * scale_y), int(width * scale_x), int(height * scale_y)),
+            line_rects=_image_rects(line_boxes, x, y, scale_x, scale_y),
+            string_rects=_image_rects(string_boxes, x, y, scale_x, scale_y),
         ))
 
     return blocks, page_width, page_height
 
 
+def _outline_mask(shape: tuple[int, int], x1: np.ndarray, y1: np.ndarray,
+                  x2: np.ndarray, y2: np.ndarray, width: int) -> np.ndarray:
+    """Rasterize rectangle outlines into a boolean mask in a single pass.
+
+    Matches ImageDraw.rectangle([x1, y1, x2, y2], width=width) for boxes at
+    least 2 * width across: corners are inclusive and the outline grows inwards.
+    Each outline is its outer rectangle minus its inner one, accumulated in a
+    2D difference array.
+    """
+    height, width_px = shape
+    diff = np.zeros((height + 1, width_px + 1), dtype=np.int32)
+
+    def add(left, top, right, bottom, sign):
+        left = np.clip(left, 0, width_px)
+        right = np.clip(right, 0, width_px)
+        top = np.clip(top, 0, height)
+        bottom = np.clip(bottom, 0, height)
+        keep = (left < right) & (top < bottom)
+        left, top, right, bottom = left[keep], top[keep], right[keep], bottom[keep]
+        np.add.at(diff, (top, left), sign)
+        np.add.at(diff, (top, right), -sign)
+        np.add.at(diff, (bottom, left), -sign)
+        np.add.at(diff, (bottom, right), sign)
+
+    add(x1, y1, x2 + 1, y2 + 1, 1)
+    add(x1 + width, y1 + width, x2 + 1 - width, y2 + 1 - width, -1)
+    return diff.cumsum(axis=0).cumsum(axis=1)[:height, :width_px] > 0
+
+
+@lru_cache(maxsize=32)
+def _parse_blocks_cached(xml_path: str, mtime_ns: int, image_size: tuple[int, int] | None
+                         ) -> tuple[list[TextBlock], int, int]:
+    """Parse an ALTO file once per modification time and image size."""
+    return parse_alto_blocks(Path(xml_path), image_size)
+
+
+def read_image_size(image_path: Path) -> tuple[int, int]:
+    """Read the image dimensions from the file header without decoding pixels."""
+    with Image.open(image_path) as img:
+        return img.size
+
+
+# Decoded pages are large, so keep only a handful around
+@lru_cache(maxsize=4)
+def _load_image_cached(image_path: str, mtime_ns: int) -> np.ndarray:
+    """Decode a page image once per modification time, in its native mode.
+
+    The array is a read-only copy of the decoded pixels; the PIL image is closed on return.
+    """
+    with Image.open(image_path) as img:
+        return np.asarray(img)
+
+
+# One lock per loader and image, so concurrent misses share a single decode
+_decode_locks: dict[tuple[object, str], threading.Lock] = {}
+_decode_locks_guard = threading.Lock()
+
+
+def _load_once(loader, image_path: Path) -> np.ndarray:
+    """Call a cached image loader, letting callers that miss together wait for one decode."""
+    with _decode_locks_guard:
+        lock = _decode_locks.setdefault((loader, str(image_path)), threading.Lock())
+    with lock:
+        return loader(str(image_path), image_path.stat().st_mtime_ns)
+
+
+def load_page_image(image_path: Path) -> np.ndarray:
+    """Get the decoded page pixels, using cache if available."""
+    return _load_once(_load_image_cached, image_path)
+
+
+@lru_cache(maxsize=4)
+def _load_thumbnail_cached(image_path: str, mtime_ns: int) -> np.ndarray:
+    """Decode a page once at reduced resolution and downscale it to fit within THUMBNAIL_SIZE."""
+    width, height = read_image_size(Path(image_path))
+    scale = min(THUMBNAIL_SIZE / width, THUMBNAIL_SIZE / height, 1.0)
+    # Stop the decoder at the coarsest level still covering the thumbnail
+    level = reduce_level((width, height), (int(width * scale), int(height * scale)))
+    thumb = load_image_reduced(Path(image_path), level)
+    thumb.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.BILINEAR)
+    return np.asarray(thumb)
+
+
+def load_page_thumbnail(image_path: Path) -> np.ndarray:
+    """Get the downscaled page pixels, using cache if available."""
+    return _load_once(_load_thumbnail_cached, image_path)
+
+
+def _resize_for_display(img: Image.Image, width: int, height: int) -> Image.Image:
+    """Downscale a block crop, taking a fast box-reduce before the LANCZOS pass."""
+    if (width, height) == img.size:
+        return img
+    # Integer box reduction to within 2x of the target, then LANCZOS
+    return img.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+# Encoder output buffers, reused per thread so their storage is only grown once
+_encode_buffers = threading.local()
+
+
+def _encode_image(img: Image.Image, fmt: str) -> bytes:
+    """Encode an image in one of BLOCK_IMAGE_FORMATS into a reused buffer."""
+    buffer = getattr(_encode_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _encode_buffers.buffer = io.BytesIO()
+    # Overwrite from the start; only the bytes written this time are returned
+    buffer.seek(0)
+    img.save(buffer, **BLOCK_IMAGE_FORMATS[fmt])
+    size = buffer.tell()
+    with buffer.getbuffer() as view:
+        return bytes(view[:size])
+
+
+def render_block_image(page: np.ndarray, block: TextBlock, fmt: str = "webp",
+                       thumb: np.ndarray | None = None) -> bytes:
+    """Render a block crop with its bounding boxes as encoded image bytes.
+
+    The block must have been parsed against the size of this page image.
+    Blocks that would still be shrunk for display when cropped from thumb,
+    a downscaled copy of the page, are rendered from it instead.
+    """
+    padding = BLOCK_PADDING
+    img_x, img_y, img_w, img_h = block.image_box
+    line_rects, string_rects = block.line_rects, block.string_rects
+
+    if thumb is not None:
+        scale = np.array([thumb.shape[1] / page.shape[1], thumb.shape[0] / page.shape[0]] * 2)
+        thumb_box = (np.array(block.image_box) * scale).astype(np.int32)
+        thumb_padding = int(BLOCK_PADDING * scale[0])
+        if max(thumb_box[2:]) + 2 * thumb_padding >= MAX_DISPLAY_SIZE:
+            page, padding = thumb, thumb_padding
+            img_x, img_y, img_w, img_h = (int(v) for v in thumb_box)
+            line_rects = (line_rects * scale).astype(np.int32)
+            string_rects = (string_rects * scale).astype(np.int32)
+
+    image_height, image_width = page.shape[:2]
+
+    # Crop with padding
+    crop_x1 = max(0, img_x - padding)
+    crop_y1 = max(0, img_y - padding)
+    crop_x2 = min(image_width, img_x + img_w + padding)
+    crop_y2 = min(image_height, img_y + img_h + padding)
+
+    # Only the crop is converted, so the cached page can stay grayscale
+    crop = Image.fromarray(page[crop_y1:crop_y2, crop_x1:crop_x2])
+    pixels = np.array(crop.convert("RGB"))
+
+    # Offset for drawing (account for crop and padding)
+    offset_x = img_x - crop_x1
+    offset_y = img_y - crop_y1
+
+    # Draw TextLine boxes (blue), then String boxes (red) on top
+    offset = np.array([offset_x, offset_y, offset_x, offset_y], dtype=np.int32)
+    for rects, color, width in ((line_rects, (0, 0, 255), 2), (string_rects, (255, 0, 0), 1)):
+        x1, y1, x2, y2 = (rects + offset).T
+        pixels[_outline_mask(pixels.shape[:2], x1, y1, x2, y2, width)] = color
+
+    cropped = Image.fromarray(pixels)
+
+    # Shrink large blocks for display; small ones are sent as cropped
+    max_display = MAX_DISPLAY_SIZE
+    if cropped.width > max_display or cropped.height > max_display:
+        display_scale = min(max_display / cropped.width, max_display / cropped.height)
+        display_w = int(cropped.width * display_scale)
+        display_h = int(cropped.height * display_scale)
+        cropped = _resize_for_display(cropped, display_w, display_h)
+
+    return _encode_image(cropped, fmt)
+
+
+def _render_shared_block(shm_name: str, shape: tuple[int, ...], thumb_shape: tuple[int, ...],
+                         dtype: str, block: TextBlock) -> bytes:
+    """Render a block in a worker process from page pixels in shared memory.
+
+    The segment holds the page followed by its thumbnail.
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        page = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        thumb = np.ndarray(thumb_shape, dtype=dtype, buffer=shm.buf, offset=page.nbytes)
+        image_data = render_block_image(page, block, thumb=thumb)
+        del page, thumb  # release the views so the segment can be closed
+        return image_data
+    finally:
+        shm.close()
+
+
 class ViewerState:
     """Global state for the block viewer."""
 
@@ -105,87 +378,158 @@ class ViewerState:
         self.blocks: list[TextBlock] = []
         self.page_width = 0
         self.page_height = 0
-        self.image: Image.Image | None = None
+        self.image_path: Path | None = None
+        self.image_size: tuple[int, int] | None = None
+        # Modification times of the current XML and image, which its renders depend on
+        self.file_version: tuple[int, int] = (0, 0)
+        # Created by load_base_dir rather than here: spawned render workers import
+        # this module, and must not start pools of their own
+        self._executor: ThreadPoolExecutor | None = None
+        self._render_pool: ProcessPoolExecutor | None = None
+        self._prefetches: dict[int, Future] = {}
+        # Keyed by (file index, file version, block index, format)
+        self.block_image_cache: dict[tuple[int, tuple[int, int], int, str], bytes] = {}
 
     def load_base_dir(self, base_dir: Path):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2)
+            # Rendering is CPU-bound, so prerendering fans out over processes.
+            # Spawn avoids forking a process that is already running threads.
+            self._render_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+            )
         self.base_dir = base_dir
         self.pairs = find_ocr_pairs(base_dir)
         self.current_pair_index = 0
+        self._prefetches.clear()
+        self.block_image_cache.clear()
         if self.pairs:
             self.load_current_file()
 
     def load_current_file(self):
         if not self.pairs:
             return
+        # Join an in-flight prefetch rather than decoding the same page twice
+        pending = self._prefetches.pop(self.current_pair_index, None)
+        if pending is not None and not pending.cancel():
+            wait([pending])
+
         xml_path, image_path = self.pairs[self.current_pair_index]
-        self.blocks, self.page_width, self.page_height = parse_alto_blocks(xml_path)
+        self.file_version = self.pair_version(self.current_pair_index)
+        self._evict_block_images()
+        # Only read the header here; pixels are decoded on first use
         try:
-            with Image.open(image_path) as img:
-                self.image = img.convert("RGB").copy()
+            self.image_size = read_image_size(image_path)
+            self.image_path = image_path
         except Exception as e:
             print(f"Error loading image: {e}")
-            self.image = None
-
-    def get_block_image(self, block_index: int) -> str | None:
-        """Get base64-encoded PNG of a block with bounding boxes."""
-        if self.image is None or block_index >= len(self.blocks):
-            return None
-
+            self.image_path = None
+            self.image_size = None
+
+        self.blocks, self.page_width, self.page_height = _parse_blocks_cached(
+            str(xml_path), xml_path.stat().st_mtime_ns, self.image_size
+        )
+
+        if self.image_path is not None:
+            self._executor.submit(
+                self._prerender_blocks, self.current_pair_index, self.file_version, self.image_path, self.blocks,
+            )
+        self._schedule_prefetch()
+
+    def pair_version(self, pair_index: int) -> tuple[int, int]:
+        """Modification times of a file's XML and image, identifying the renders made from them."""
+        xml_path, image_path = self.pairs[pair_index]
+        try:
+            return xml_path.stat().st_mtime_ns, image_path.stat().st_mtime_ns
+        except OSError:
+            return 0, 0
+
+    def _evict_block_images(self):
+        """Drop renders of files other than the current one and its neighbours, and outdated ones."""
+        current = self.current_pair_index
+        for key in list(self.block_image_cache):
+            pair_index, version = key[:2]
+            if abs(pair_index - current) > 1 or (pair_index == current and version != self.file_version):
+                self.block_image_cache.pop(key, None)
+
+    def _schedule_prefetch(self):
+        """Warm the caches for the neighbouring files in the background."""
+        wanted = {
+            i for i in (self.current_pair_index + 1, self.current_pair_index - 1)
+            if 0 <= i < len(self.pairs)
+        }
+        for index, future in list(self._prefetches.items()):
+            if index not in wanted:
+                future.cancel()
+                del self._prefetches[index]
+        for index in wanted:
+            if index not in self._prefetches:
+                self._prefetches[index] = self._executor.submit(self._prefetch, index)
+
+    def _prefetch(self, pair_index: int):
+        xml_path, image_path = self.pairs[pair_index]
+        image_size = read_image_size(image_path)
+        _parse_blocks_cached(str(xml_path), xml_path.stat().st_mtime_ns, image_size)
+        load_page_thumbnail(image_path)  # a reduced-resolution decode only
+
+    def block_meta(self, block_index: int) -> dict:
+        """Get the id, text and image URL of a block."""
         block = self.blocks[block_index]
+        image_url = ""
+        if self.image_path is not None and block.lines:
+            # The version changes the URL when the file does, so browsers never reuse an old crop
+            xml_mtime_ns, image_mtime_ns = self.file_version
+            image_url = (f"/api/block_image/{block_index}?file={self.current_pair_index}"
+                         f"&v={xml_mtime_ns:x}-{image_mtime_ns:x}")
+        return {
+            "id": block.id,
+            "text": block.get_text(),
+            "image_url": image_url,
+        }
+
+    def get_block_image(self, block_index: int, fmt: str = "webp") -> bytes | None:
+        """Get the encoded image of a block with bounding boxes."""
+        if self.image_path is None or block_index >= len(self.blocks):
+            return None
+        # Blocks without lines are OCR noise; there is nothing to outline
+        if not self.blocks[block_index].lines:
+            return None
 
-        # Scale from ALTO coordinates to image coordinates
-        scale_x = self.image.width / self.page_width
-        scale_y = self.image.height / self.page_height
-
-        # Add padding around the block
-        padding = 20
-        img_x = int(block.x * scale_x)
-        img_y = int(block.y * scale_y)
-        img_w = int(block.width * scale_x)
-        img_h = int(block.height * scale_y)
-
-        # Crop with padding
-        crop_x1 = max(0, img_x - padding)
-        crop_y1 = max(0, img_y - padding)
-        crop_x2 = min(self.image.width, img_x + img_w + padding)
-        crop_y2 = min(self.image.height, img_y + img_h + padding)
-
-        cropped = self.image.crop((crop_x1, crop_y1, crop_x2, crop_y2))
-
-        # Draw bounding boxes
-        draw = ImageDraw.Draw(cropped)
-
-        # Offset for drawing (account for crop and padding)
-        offset_x = img_x - crop_x1
-        offset_y = img_y - crop_y1
-
-        # Draw TextLine boxes (blue)
-        for line in block.lines:
-            lx = int((line.x - block.x) * scale_x) + offset_x
-            ly = int((line.y - block.y) * scale_y) + offset_y
-            lw = int(line.width * scale_x)
-            lh = int(line.height * scale_y)
-            draw.rectangle([lx, ly, lx + lw, ly + lh], outline="blue", width=2)
-
-            # Draw String boxes (red)
-            for string in line.strings:
-                sx = int((string.x - block.x) * scale_x) + offset_x
-                sy = int((string.y - block.y) * scale_y) + offset_y
-                sw = int(string.width * scale_x)
-                sh = int(string.height * scale_y)
-                draw.rectangle([sx, sy, sx + sw, sy + sh], outline="red", width=1)
-
-        # Scale for display
-        max_display = 800
-        display_scale = min(max_display / cropped.width, max_display / cropped.height, 2.0)
-        display_w = int(cropped.width * display_scale)
-        display_h = int(cropped.height * display_scale)
-        cropped = cropped.resize((display_w, display_h), Image.Resampling.LANCZOS)
-
-        # Convert to base64
-        buffer = io.BytesIO()
-        cropped.save(buffer, format="PNG")
-        return base64.b64encode(buffer.getvalue()).decode()
+        key = (self.current_pair_index, self.file_version, block_index, fmt)
+        if key not in self.block_image_cache:
+            self.block_image_cache[key] = render_block_image(
+                load_page_image(self.image_path), self.blocks[block_index], fmt,
+                thumb=load_page_thumbnail(self.image_path),
+            )
+        return self.block_image_cache[key]
+
+    def _prerender_blocks(self, pair_index: int, version: tuple[int, int], image_path: Path,
+                          blocks: list[TextBlock]):
+        page = load_page_image(image_path)
+        thumb = load_page_thumbnail(image_path)
+
+        # Share the page with the workers once instead of pickling it per block
+        shm = SharedMemory(create=True, size=max(page.nbytes + thumb.nbytes, 1))
+        try:
+            np.ndarray(page.shape, dtype=page.dtype, buffer=shm.buf)[...] = page
+            np.ndarray(thumb.shape, dtype=thumb.dtype, buffer=shm.buf, offset=page.nbytes)[...] = thumb
+            futures = {}
+            for block_index, block in enumerate(blocks):
+                key = (pair_index, version, block_index, "webp")
+                if block.lines and key not in self.block_image_cache:
+                    futures[key] = self._render_pool.submit(
+                        _render_shared_block, shm.name, page.shape, thumb.shape, page.dtype.str, block,
+                    )
+            for key, future in futures.items():
+                # Stop early once the user has moved on to another file or it was reloaded
+                if (pair_index, version) != (self.current_pair_index, self.file_version):
+                    for pending in futures.values():
+                        pending.cancel()
+                    return
+                self.block_image_cache[key] = future.result()
+        finally:
+            shm.close()
+            shm.unlink()
 
 
 state = ViewerState()
@@ -203,19 +547,43 @@ def load_file(file_index: int):
     return jsonify({"total_blocks": len(state.blocks)})
 
 
+@app.route("/api/page")
+def get_page_blocks():
+    """All blocks of the current file at once, so navigation needs no requests."""
+    return jsonify({"blocks": [state.block_meta(i) for i in range(len(state.blocks))]})
+
+
 @app.route("/api/block/<int:block_index>")
-def get_block(block_index: int):
+def get_block_meta(block_index: int):
     if block_index >= len(state.blocks):
         return jsonify({"error": "Block not found"}), 404
-
-    block = state.blocks[block_index]
-    image_data = state.get_block_image(block_index)
-
-    return jsonify({
-        "id": block.id,
-        "text": block.get_text(),
-        "image": image_data or "",
-    })
+    return jsonify(state.block_meta(block_index))
+
+
+@app.route("/api/block_image/<int:block_index>")
+def get_block_image_raw(block_index: int):
+    fmt = request.args.get("fmt", "webp")
+    if fmt not in BLOCK_IMAGE_FORMATS:
+        return jsonify({"error": f"Unsupported image format: {fmt}"}), 400
+
+    # The file index keeps URLs unique per file so browsers never show a stale crop
+    file_index = request.args.get("file", state.current_pair_index, type=int)
+    if file_index == state.current_pair_index:
+        version = state.file_version
+        image_data = state.get_block_image(block_index, fmt)
+    elif 0 <= file_index < len(state.pairs):
+        version = state.pair_version(file_index)
+        image_data = state.block_image_cache.get((file_index, version, block_index, fmt))
+    else:
+        image_data = None
+
+    if image_data is None:
+        return "Not found", 404
+    # Revisited blocks come from the browser cache, or as a 304 once it goes stale
+    xml_mtime_ns, image_mtime_ns = version
+    etag = f"{xml_mtime_ns:x}-{image_mtime_ns:x}-{hashlib.blake2b(image_data, digest_size=16).hexdigest()}"
+    return send_file(io.BytesIO(image_data), mimetype=f"image/{fmt}", etag=etag,
+                     conditional=True, max_age=CACHE_MAX_AGE)
 
 
 def main():
@@ -238,7 +606,7 @@ def main():
     print("Starting server at http://127.0.0.1:5000")
     print("Press Ctrl+C to stop")
 
-    app.run(debug=False, port=5000)
+    serve(app, host="127.0.0.1", port=5000, threads=SERVER_THREADS)
 
 
 if __name__ == "__main__":
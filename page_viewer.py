@@ -4,264 +4,483 @@
 from flask import Flask, render_template, send_file, jsonify, request
 from pathlib import Path
 from dataclasses import dataclass
-import xml.etree.ElementTree as ET
+from functools import lru_cache
+import hashlib
 import io
-
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zipfile
+
+import lxml.etree as ET
+import numpy as np
 from PIL import Image
-
-from alto_utils import ALTO_NS, find_newspaper_dirs, find_ocr_pairs
+from waitress import serve
+
+from alto_utils import (
+    CACHE_MAX_AGE,
+    SERVER_THREADS,
+    TAG_COMPOSED_BLOCK,
+    TAG_ILLUSTRATION,
+    TAG_PAGE,
+    TAG_STRING,
+    TAG_TEXT_LINE,
+    UNPACKED_DIR,
+    OrjsonProvider,
+    enable_compression,
+    find_newspaper_dirs,
+    find_ocr_pairs,
+    load_image_reduced,
+    parse_ints,
+    reduce_level,
+)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+enable_compression(app)
 
+# Elements parse_alto_xml reads from a page
+_PAGE_TAGS = (TAG_PAGE, TAG_STRING, TAG_TEXT_LINE, TAG_ILLUSTRATION, TAG_COMPOSED_BLOCK)
 
-@dataclass
-class TextBox:
-    """A text element with its bounding box."""
-    content: str
-    x: int
-    y: int
-    width: int
-    height: int
 
+@dataclass(slots=True)
+class ElementBoxes:
+    """Bounding boxes of one kind of page element, stored column-wise."""
+    boxes: np.ndarray  # (N, 4) int32 rows of (x, y, width, height) in ALTO units
+    labels: list[str]  # CONTENT, TYPE or ID per row; empty for text lines
 
-@dataclass
-class TextLine:
-    """A text line with its bounding box."""
-    x: int
-    y: int
-    width: int
-    height: int
 
+# Encoder settings for rendered page images, chosen by what the client accepts
+PAGE_IMAGE_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    # Progressive scans paint a coarse page early; the encode is paid once per cached render
+    "jpeg": {"format": "JPEG", "quality": 85, "progressive": True},
+}
 
-@dataclass
-class Illustration:
-    """An illustration with its bounding box."""
-    x: int
-    y: int
-    width: int
-    height: int
-    type: str
+# Zoom levels the viewer offers, in percent; only these are rendered
+ZOOM_LEVELS = range(25, 401, 25)
 
+# Rendered page images persist here across restarts, least recently used
+# first out once they take up more than the size limit
+RENDER_CACHE_DIR = UNPACKED_DIR / ".rendercache"
+RENDER_CACHE_MAX_BYTES = 1 << 30
 
-@dataclass
-class ComposedBlock:
-    """A composed block (article) with its bounding box."""
-    x: int
-    y: int
-    width: int
-    height: int
-    id: str
+# Pages rendered at the default zoom in the background at startup
+WARM_PAGES = 3
 
+# Parsed pages persist here across restarts, outside the newspaper data.
+# Bump the version whenever the layout of the stored arrays changes.
+PARSE_CACHE_DIR = UNPACKED_DIR / ".parsecache"
+PARSE_CACHE_VERSION = 1
 
 # Global state and caches
-_pairs: list[tuple[Path, Path]] = []
+_pairs: tuple[tuple[Path, Path], ...] = ()
 _base_dir: Path | None = None
-_xml_cache: dict[Path, tuple] = {}
-_image_dims_cache: dict[Path, tuple[int, int]] = {}
-_rendered_image_cache: dict[tuple, bytes] = {}  # (path, zoom) -> JPEG bytes
 
 
-def parse_alto_xml(xml_path: Path) -> tuple[list[TextBox], list[TextLine], list[Illustration], list[ComposedBlock], int, int]:
+def parse_alto_xml(xml_path: Path) -> tuple[ElementBoxes, ElementBoxes, ElementBoxes, ElementBoxes, int, int]:
     """Parse ALTO XML and return text boxes, text lines, illustrations, composed blocks, and page dimensions."""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-
-    page = root.find(".//alto:Page", ALTO_NS)
-    page_width = int(page.get("WIDTH", 0))
-    page_height = int(page.get("HEIGHT", 0))
-
-    boxes = []
-    for string in root.findall(".//alto:String", ALTO_NS):
-        boxes.append(TextBox(
-            content=string.get("CONTENT", ""),
-            x=int(string.get("HPOS", 0)),
-            y=int(string.get("VPOS", 0)),
-            width=int(string.get("WIDTH", 0)),
-            height=int(string.get("HEIGHT", 0))
-        ))
-
-    lines = []
-    for line in root.findall(".//alto:TextLine", ALTO_NS):
-        lines.append(TextLine(
-            x=int(line.get("HPOS", 0)),
-            y=int(line.get("VPOS", 0)),
-            width=int(line.get("WIDTH", 0)),
-            height=int(line.get("HEIGHT", 0))
-        ))
-
-    illustrations = []
-    for ill in root.findall(".//alto:Illustration", ALTO_NS):
-        illustrations.append(Illustration(
-            x=int(ill.get("HPOS", 0)),
-            y=int(ill.get("VPOS", 0)),
-            width=int(ill.get("WIDTH", 0)),
-            height=int(ill.get("HEIGHT", 0)),
-            type=ill.get("TYPE", "")
-        ))
-
-    composed_blocks = []
-    for block in root.findall(".//alto:ComposedBlock", ALTO_NS):
-        composed_blocks.append(ComposedBlock(
-            x=int(block.get("HPOS", 0)),
-            y=int(block.get("VPOS", 0)),
-            width=int(block.get("WIDTH", 0)),
-            height=int(block.get("HEIGHT", 0)),
-            id=block.get("ID", "")
-        ))
-
-    return boxes, lines, illustrations, composed_blocks, page_width, page_height
+    # Parse straight from the mapped file in one call instead of lxml's chunked reads
+    with open(xml_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        root = ET.fromstring(mapped)
+
+    page_width = page_height = 0
+    coords = {tag: [] for tag in _PAGE_TAGS}
+    labels = {tag: [] for tag in _PAGE_TAGS}
+    label_attrs = {TAG_STRING: "CONTENT", TAG_ILLUSTRATION: "TYPE", TAG_COMPOSED_BLOCK: "ID"}
+
+    # A single walk over the tree, dispatching each element on its tag
+    for elem in root.iter(_PAGE_TAGS):
+        tag = elem.tag
+        if tag == TAG_PAGE:
+            if not page_width:
+                page_width = int(elem.get("WIDTH", 0))
+                page_height = int(elem.get("HEIGHT", 0))
+            continue
+        # Raw attribute strings; each category is converted to integers in one call
+        get = elem.get
+        coords[tag] += (get("HPOS", "0"), get("VPOS", "0"), get("WIDTH", "0"), get("HEIGHT", "0"))
+        label_attr = label_attrs.get(tag)
+        if label_attr is not None:
+            labels[tag].append(sys.intern(get(label_attr, "")))
+
+    def collect(tag: str) -> ElementBoxes:
+        return ElementBoxes(parse_ints(coords[tag]).reshape(-1, 4), labels[tag])
+
+    return (
+        collect(TAG_STRING),
+        collect(TAG_TEXT_LINE),
+        collect(TAG_ILLUSTRATION),
+        collect(TAG_COMPOSED_BLOCK),
+        page_width,
+        page_height,
+    )
 
 
 def init_pairs():
-    """Initialize the OCR pairs."""
+    """Scan for OCR pairs; called once when the module is loaded."""
     global _pairs, _base_dir
-    if not _pairs:
-        dirs = find_newspaper_dirs()
-        if dirs:
-            _base_dir = dirs[0]
-            _pairs = find_ocr_pairs(_base_dir)
+    dirs = find_newspaper_dirs()
+    if dirs:
+        _base_dir = dirs[0]
+        _pairs = tuple(find_ocr_pairs(_base_dir))
+
+
+def load_parsed_xml(xml_path: Path):
+    """Parse an ALTO file, reusing the arrays saved by an earlier run."""
+    key = hashlib.blake2b(str(xml_path.absolute()).encode(), digest_size=16).hexdigest()
+    cache_file = PARSE_CACHE_DIR / f"{key}.npz"
+    # Unpacking restores archive mtimes, so a replaced file can be older than its cache;
+    # the cache is only valid for the exact mtime and size it was parsed from
+    stat = xml_path.stat()
+    source = np.array([PARSE_CACHE_VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+    try:
+        # Plain arrays only; nothing in the cache is unpickled
+        with np.load(cache_file, allow_pickle=False) as cached:
+            if np.array_equal(cached["source"], source):
+                labels = app.json.loads(cached["labels"].tobytes())
+                kinds = [ElementBoxes(cached[f"boxes{i}"], [sys.intern(text) for text in labels[i]])
+                         for i in range(len(labels))]
+                page_width, page_height = cached["page_size"].tolist()
+                return (*kinds, page_width, page_height)
+    except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+        pass  # missing or unreadable cache: parse again
+
+    parsed = parse_alto_xml(xml_path)
+    *kinds, page_width, page_height = parsed
+    tmp_file = cache_file.with_suffix(f".tmp{os.getpid()}-{threading.get_ident()}")
+    try:
+        PARSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary name first so a crash never leaves a truncated cache
+        with open(tmp_file, "wb") as f:
+            np.savez(
+                f,
+                source=source,
+                page_size=np.array([page_width, page_height], dtype=np.int64),
+                labels=np.frombuffer(app.json.dumps_bytes([kind.labels for kind in kinds]), dtype=np.uint8),
+                **{f"boxes{i}": kind.boxes for i, kind in enumerate(kinds)},
+            )
+        tmp_file.replace(cache_file)
+    except OSError as e:
+        print(f"Could not write parse cache {cache_file}: {e}")
+    finally:
+        try:
+            tmp_file.unlink(missing_ok=True)
+        except OSError:
+            pass  # the cache directory itself is unusable
+    return parsed
+
+
+@lru_cache(maxsize=32)
+def _parse_xml_cached(xml_path: str, mtime_ns: int):
+    """Parse an ALTO file once per modification time."""
+    return load_parsed_xml(Path(xml_path))
 
 
 def get_parsed_xml(xml_path: Path):
-    """Get parsed XML data, using cache if available."""
-    if xml_path not in _xml_cache:
-        _xml_cache[xml_path] = parse_alto_xml(xml_path)
-    return _xml_cache[xml_path]
+    """Get parsed XML data, using cache if the file is unchanged."""
+    return _parse_xml_cached(str(xml_path), xml_path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _read_image_dims(image_path: str, mtime_ns: int) -> tuple[int, int]:
+    """Read image dimensions from the file header once per modification time."""
+    with Image.open(image_path) as img:
+        return img.width, img.height
 
 
 def get_image_dims(image_path: Path) -> tuple[int, int]:
-    """Get image dimensions, using cache if available."""
-    if image_path not in _image_dims_cache:
-        with Image.open(image_path) as img:
-            _image_dims_cache[image_path] = (img.width, img.height)
-    return _image_dims_cache[image_path]
+    """Get image dimensions, using cache if the file is unchanged."""
+    return _read_image_dims(str(image_path), image_path.stat().st_mtime_ns)
+
+
+def _render_cache_path(image_path: str, mtime_ns: int, zoom: int, fmt: str) -> Path:
+    """Location of the on-disk copy of a rendered page image."""
+    key = hashlib.blake2b(f"{image_path}:{mtime_ns}:{zoom}".encode(), digest_size=16).hexdigest()
+    return RENDER_CACHE_DIR / f"{key}.{fmt}"
+
+
+# Nearby zoom levels and both output formats share a decode, so keep the latest few
+@lru_cache(maxsize=4)
+def _decode_page_image(image_path: str, mtime_ns: int, level: int) -> Image.Image:
+    """Decode a page image once per modification time and reduction level."""
+    return load_image_reduced(Path(image_path), level)
+
+
+def _render_page_image(image_path: Path, zoom: int, fmt: str) -> bytes:
+    """Render a page image at a zoom level as encoded bytes."""
+    orig_width, orig_height = get_image_dims(image_path)
+
+    base_scale = min(3200 / orig_width, 3200 / orig_height, 4.0)
+    img_scale = base_scale * (zoom / 100.0)
+    display_width = int(orig_width * img_scale)
+    display_height = int(orig_height * img_scale)
+
+    level = reduce_level((orig_width, orig_height), (display_width, display_height))
+    decoded = image = _decode_page_image(str(image_path), image_path.stat().st_mtime_ns, level)
+    if image.size != (display_width, display_height):
+        # When the decoder could not reduce enough (formats without resolution levels,
+        # or beyond the JPEG 2000 limit), box-reduce by an integer factor first
+        image = image.resize((display_width, display_height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    # Both encoders take grayscale as is, so only other modes need converting
+    if image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+    if image is decoded:
+        # save() stores encoder settings on the image, and the decode is shared
+        # between threads through the lru_cache; encode a private copy instead
+        image = image.copy()
+
+    buffer = io.BytesIO()
+    image.save(buffer, **PAGE_IMAGE_FORMATS[fmt])
+    return buffer.getvalue()
+
+
+def get_page_image_file(image_path: Path, zoom: int, fmt: str) -> Path | bytes:
+    """Get the rendered page image file, rendering it into the disk cache if needed.
+
+    Returns the encoded image itself when the cache cannot be written.
+    """
+    cache_path = _render_cache_path(str(image_path), image_path.stat().st_mtime_ns, zoom, fmt)
+    try:
+        mtime_ns = cache_path.stat().st_mtime_ns
+    except OSError:
+        pass  # not rendered yet, or the cache is unusable
+    else:
+        try:
+            # Record the use in the access time only; the mtime backs the response's validators
+            os.utime(cache_path, ns=(time.time_ns(), mtime_ns))
+        except OSError:
+            pass  # read-only cache: it still serves, only pruning order suffers
+        return cache_path
+
+    image_bytes = _render_page_image(image_path, zoom, fmt)
+    # Write to a unique temporary name first so readers never see a partial file
+    tmp_path = cache_path.with_suffix(f".tmp{os.getpid()}-{threading.get_ident()}")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(image_bytes)
+        tmp_path.replace(cache_path)
+    except OSError as e:
+        print(f"Could not write render cache {cache_path}: {e}")
+        return image_bytes
+    finally:
+        try:
+            tmp_path.unlink(missing_ok=True)
+        except OSError:
+            pass  # the cache directory itself is unusable
+    _prune_render_cache()
+    return cache_path
+
+
+def _prune_render_cache():
+    """Delete the least recently used rendered images until the cache fits its size limit.
+
+    Renders of replaced images and unused zoom levels are never requested again,
+    so they age out here.
+    """
+    entries = []
+    for fmt in PAGE_IMAGE_FORMATS:
+        for path in RENDER_CACHE_DIR.glob(f"*.{fmt}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # pruned by another thread
+            entries.append((stat.st_atime_ns, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= RENDER_CACHE_MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
 
 
 @app.route("/")
 def index():
     """Serve the main viewer page."""
-    init_pairs()
     return render_template("page_viewer.html")
 
 
 @app.route("/api/info")
 def api_info():
     """Return basic info about available pages."""
-    init_pairs()
     return jsonify({
         "total_pages": len(_pairs),
         "base_dir": str(_base_dir) if _base_dir else None
     })
 
 
+# Element kinds sent to the client, in binary payload order, with the name of their label column
+_PAGE_KINDS = {"boxes": "content", "lines": None, "illustrations": "type", "composed_blocks": "id"}
+
+
+def _page_data(index: int) -> tuple[dict, dict[str, ElementBoxes]]:
+    """Get the fields describing a page and its boxes for each of _PAGE_KINDS."""
+    xml_path, image_path = _pairs[index]
+    boxes, lines, illustrations, composed_blocks, page_width, page_height = get_parsed_xml(xml_path)
+    img_width, img_height = get_image_dims(image_path)
+    fields = {
+        "filename": xml_path.stem,
+        "total_pages": len(_pairs),
+        "page_width": page_width,
+        "page_height": page_height,
+        "image_width": img_width,
+        "image_height": img_height,
+    }
+    return fields, dict(zip(_PAGE_KINDS, (boxes, lines, illustrations, composed_blocks)))
+
+
+# Boxes are sent in ALTO units and scaled by the client, so one payload serves every zoom.
+# The XML and image modification times are part of the key so an edited page is served afresh.
+@lru_cache(maxsize=64)
+def _build_page_payload(index: int, mtimes: tuple[int, int]) -> tuple[bytes, str]:
+    """Serialize the boxes and dimensions of a page and return the JSON with its ETag."""
+    fields, elements = _page_data(index)
+    for kind, label in _PAGE_KINDS.items():
+        # One array per coordinate; orjson serializes them without per-box objects
+        x, y, width, height = np.ascontiguousarray(elements[kind].boxes.T)
+        fields[kind] = {"x": x, "y": y, "width": width, "height": height}
+        if label is not None:
+            fields[kind][label] = elements[kind].labels
+
+    payload = app.json.dumps_bytes(fields)
+    return payload, hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=64)
+def _build_page_binary(index: int, mtimes: tuple[int, int]) -> tuple[bytes, str]:
+    """Pack the boxes and dimensions of a page into a binary payload and return it with its ETag.
+
+    The payload is a little-endian uint32 header length, a JSON header with the page
+    fields and the box count and distinct labels of each kind, zero padding to a
+    multiple of 4 bytes, then the x, y, width and height columns of each kind as int32,
+    followed for labelled kinds by an int32 column indexing into the distinct labels.
+    """
+    fields, elements = _page_data(index)
+    columns = []
+    for kind, label in _PAGE_KINDS.items():
+        fields[kind] = {"count": len(elements[kind].boxes)}
+        # Transposed so each coordinate is one run the client can view as an Int32Array
+        columns.append(np.ascontiguousarray(elements[kind].boxes.T, dtype="<i4").tobytes())
+        if label is not None:
+            # Words like "og" and "i" recur throughout a page; send each string once
+            lookup: dict[str, int] = {}
+            indices = [lookup.setdefault(text, len(lookup)) for text in elements[kind].labels]
+            fields[kind][label] = list(lookup)
+            columns.append(np.array(indices, dtype="<i4").tobytes())
+
+    header = app.json.dumps_bytes(fields)
+    padding = b"\0" * (-(4 + len(header)) % 4)
+    payload = b"".join([struct.pack("<I", len(header)), header, padding, *columns])
+    return payload, hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _pair_mtimes(index: int) -> tuple[int, int]:
+    """Modification times of a page's XML and image, the inputs of its payloads."""
+    xml_path, image_path = _pairs[index]
+    return xml_path.stat().st_mtime_ns, image_path.stat().st_mtime_ns
+
+
+def _page_response(payload: bytes, etag: str, mimetype: str):
+    """Wrap a serialized page in a cacheable response, answering 304 when the client has it."""
+    response = app.response_class(payload, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    return response.make_conditional(request)
+
+
 @app.route("/api/page/<int:index>")
 def api_page(index: int):
     """Return page data (boxes and dimensions) for a specific page."""
-    init_pairs()
-
     if not _pairs or index < 0 or index >= len(_pairs):
         return jsonify({"error": "Page not found"})
 
-    xml_path, image_path = _pairs[index]
-    boxes, lines, illustrations, composed_blocks, page_width, page_height = get_parsed_xml(xml_path)
+    try:
+        payload, etag = _build_page_payload(index, _pair_mtimes(index))
+    except Exception as e:
+        return jsonify({"error": str(e)})
 
-    zoom = int(request.args.get("zoom", 100))
-    zoom_factor = zoom / 100.0
+    return _page_response(payload, etag, "application/json")
 
-    try:
-        img_width, img_height = get_image_dims(image_path)
-        base_scale = min(3200 / img_width, 3200 / img_height, 4.0)
-        img_scale = base_scale * zoom_factor
-        display_width = int(img_width * img_scale)
-        display_height = int(img_height * img_scale)
-
-        box_scale_x = img_width / page_width
-        box_scale_y = img_height / page_height
-
-        def scale_box(b):
-            return {
-                "x": int(b.x * box_scale_x * img_scale),
-                "y": int(b.y * box_scale_y * img_scale),
-                "width": int(b.width * box_scale_x * img_scale),
-                "height": int(b.height * box_scale_y * img_scale)
-            }
-
-        scaled_boxes = [{**scale_box(b), "content": b.content} for b in boxes]
-        scaled_lines = [scale_box(l) for l in lines]
-        scaled_illustrations = [{**scale_box(i), "type": i.type} for i in illustrations]
-        scaled_composed_blocks = [{**scale_box(c), "id": c.id} for c in composed_blocks]
-
-        return jsonify({
-            "filename": xml_path.stem,
-            "total_pages": len(_pairs),
-            "display_width": display_width,
-            "display_height": display_height,
-            "boxes": scaled_boxes,
-            "lines": scaled_lines,
-            "illustrations": scaled_illustrations,
-            "composed_blocks": scaled_composed_blocks
-        })
 
+@app.route("/api/page_bin/<int:index>")
+def api_page_bin(index: int):
+    """Return page data for a specific page in the binary layout of _build_page_binary."""
+    if not _pairs or index < 0 or index >= len(_pairs):
+        return jsonify({"error": "Page not found"}), 404
+
+    try:
+        payload, etag = _build_page_binary(index, _pair_mtimes(index))
     except Exception as e:
-        return jsonify({"error": str(e)})
+        return jsonify({"error": str(e)}), 500
+
+    return _page_response(payload, etag, "application/octet-stream")
 
 
 @app.route("/api/image/<int:index>")
 def api_image(index: int):
     """Return the base image without bounding boxes (cached)."""
-    init_pairs()
-
     if not _pairs or index < 0 or index >= len(_pairs):
         return "Not found", 404
 
     xml_path, image_path = _pairs[index]
-    zoom = int(request.args.get("zoom", 100))
-
-    # Check cache
-    cache_key = (image_path, zoom)
-    if cache_key in _rendered_image_cache:
-        buffer = io.BytesIO(_rendered_image_cache[cache_key])
-        return send_file(buffer, mimetype="image/jpeg")
-
-    zoom_factor = zoom / 100.0
-
     try:
-        image = Image.open(image_path)
-        orig_width, orig_height = image.width, image.height
-
-        if image.mode != "RGB":
-            image = image.convert("RGB")
+        zoom = int(request.args.get("zoom", 100))
+    except ValueError:
+        return "Invalid zoom", 400
+    if zoom not in ZOOM_LEVELS:
+        return "Invalid zoom", 400
+    # WebP is smaller at the same quality; serve it to clients that list it and JPEG otherwise.
+    # JPEG goes first so a bare */* gets it, and an explicit image/webp;q=0 is respected.
+    mimetype = request.accept_mimetypes.best_match(["image/jpeg", "image/webp"], default="image/jpeg")
+    fmt = "webp" if mimetype == "image/webp" else "jpeg"
 
-        base_scale = min(3200 / orig_width, 3200 / orig_height, 4.0)
-        img_scale = base_scale * zoom_factor
-        display_width = int(orig_width * img_scale)
-        display_height = int(orig_height * img_scale)
+    try:
+        # Served from disk so the WSGI server can use sendfile, with ETag/Last-Modified for 304s.
+        # The path must be absolute: Flask resolves relative ones against the app root.
+        image = get_page_image_file(image_path, zoom, fmt)
+        if isinstance(image, Path):
+            response = send_file(image.absolute(), mimetype=f"image/{fmt}", conditional=True, max_age=CACHE_MAX_AGE)
+        else:
+            # The disk cache is unavailable; send the render from memory
+            etag = hashlib.blake2b(image, digest_size=16).hexdigest()
+            response = send_file(io.BytesIO(image), mimetype=f"image/{fmt}", etag=etag,
+                                 conditional=True, max_age=CACHE_MAX_AGE)
+        response.vary.add("Accept")
+        return response
 
-        image = image.resize((display_width, display_height), Image.Resampling.BILINEAR)
+    except Exception as e:
+        return str(e), 500
 
-        buffer = io.BytesIO()
-        image.save(buffer, format="JPEG", quality=85)
-        jpeg_bytes = buffer.getvalue()
 
-        _rendered_image_cache[cache_key] = jpeg_bytes
+def warm_caches():
+    """Parse and render the first pages at the default zoom, so the first views are served from cache."""
+    for xml_path, image_path in _pairs[:WARM_PAGES]:
+        try:
+            get_parsed_xml(xml_path)
+            for fmt in PAGE_IMAGE_FORMATS:
+                get_page_image_file(image_path, 100, fmt)
+        except Exception as e:
+            print(f"Could not warm caches for {xml_path.name}: {e}")
 
-        buffer.seek(0)
-        return send_file(buffer, mimetype="image/jpeg")
 
-    except Exception as e:
-        return str(e), 500
+init_pairs()
 
 
 def main():
     """Main entry point."""
-    dirs = find_newspaper_dirs()
-    if not dirs:
+    if _base_dir is None:
         print("No unpacked newspaper directories found. Run unpack.py first.")
         return
 
-    print(f"Loading from: {dirs[0]}")
+    print(f"Loading from: {_base_dir}")
+    threading.Thread(target=warm_caches, daemon=True).start()
     print("Starting server at http://127.0.0.1:5001/")
-    app.run(host="127.0.0.1", port=5001, debug=False)
+    serve(app, host="127.0.0.1", port=5001, threads=SERVER_THREADS)
 
 
 if __name__ == "__main__":
@@ -1,26 +1,45 @@
 let currentBlock = 0;
 let totalBlocks = 0;
+let blocks = [];
+
+// How many of the following block images to fetch ahead of navigation
+const PREFETCH_AHEAD = 3;
 
 async function loadFile() {
     const fileIndex = document.getElementById('fileSelect').value;
-    const response = await fetch(`/api/load_file/${fileIndex}`);
+    await fetch(`/api/load_file/${fileIndex}`);
+    const response = await fetch('/api/page');
     const data = await response.json();
-    totalBlocks = data.total_blocks;
+    blocks = data.blocks;
+    totalBlocks = blocks.length;
     currentBlock = 0;
     loadBlock();
 }
 
-async function loadBlock() {
-    const response = await fetch(`/api/block/${currentBlock}`);
-    const data = await response.json();
+function loadBlock() {
+    const data = blocks[currentBlock];
+    if (!data) {
+        document.getElementById('blockInfo').textContent = 'No blocks';
+        return;
+    }
 
-    document.getElementById('blockImage').src = 'data:image/png;base64,' + data.image;
+    const blockImage = document.getElementById('blockImage');
+    blockImage.hidden = !data.image_url;
+    if (data.image_url) blockImage.src = data.image_url;
     document.getElementById('blockText').textContent = data.text;
     document.getElementById('blockInfo').textContent =
         `Block ${currentBlock + 1} of ${totalBlocks} (${data.id})`;
 
     document.getElementById('prevBtn').disabled = currentBlock === 0;
     document.getElementById('nextBtn').disabled = currentBlock >= totalBlocks - 1;
+
+    prefetchImages();
+}
+
+function prefetchImages() {
+    for (const next of blocks.slice(currentBlock + 1, currentBlock + 1 + PREFETCH_AHEAD)) {
+        if (next.image_url) new Image().src = next.image_url;
+    }
 }
 
 function navigate(delta) {
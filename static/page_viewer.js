@@ -3,6 +3,11 @@ let totalPages = 0;
 let zoomLevel = 100;
 let lastScrollPercent = { x: 0, y: 0 };
 let cachedPageData = null;
+// Direction of the last Prev/Next, which predicts the page wanted after this one
+let navigationStep = 1;
+// Unscaled page data by page index, kept as promises so a prefetch still in flight
+// is shared; zoom changes rescale it without a request
+const rawPages = new Map();
 
 const leftPanel = document.getElementById('leftPanel');
 const rightPanel = document.getElementById('rightPanel');
@@ -38,66 +43,14 @@ function getVisibilityParams() {
 function updateOverlays() {
     // Just update overlays without reloading image
     if (!cachedPageData) return;
-    const vis = getVisibilityParams();
-    const data = cachedPageData;
 
     // Save scroll positions
     const scrollTop = rightPanel.scrollTop;
     const scrollLeft = rightPanel.scrollLeft;
 
-    // Update left pane overlay
-    const leftOverlay = leftPanel.querySelector('.left-overlay');
-    if (leftOverlay) {
-        let leftBoxes = '';
-        if (vis.composedBlock) {
-            for (const block of data.composed_blocks) {
-                leftBoxes += `<div class="left-composed-block" style="left:${block.x}px;top:${block.y}px;width:${block.width}px;height:${block.height}px;"></div>`;
-            }
-        }
-        if (vis.illustration) {
-            for (const ill of data.illustrations) {
-                leftBoxes += `<div class="left-illustration" style="left:${ill.x}px;top:${ill.y}px;width:${ill.width}px;height:${ill.height}px;"></div>`;
-            }
-        }
-        if (vis.textLine) {
-            for (const line of data.lines) {
-                leftBoxes += `<div class="left-text-line" style="left:${line.x}px;top:${line.y}px;width:${line.width}px;height:${line.height}px;"></div>`;
-            }
-        }
-        if (vis.string) {
-            for (const box of data.boxes) {
-                leftBoxes += `<div class="left-string" style="left:${box.x}px;top:${box.y}px;width:${box.width}px;height:${box.height}px;"></div>`;
-            }
-        }
-        leftOverlay.innerHTML = leftBoxes;
-    }
-
-    // Update right pane
-    const rightOverlay = rightPanel.querySelector('.text-overlay');
-    if (rightOverlay) {
-        let textHtml = '';
-        if (vis.composedBlock) {
-            for (const block of data.composed_blocks) {
-                textHtml += `<div class="composed-block" style="left:${block.x}px;top:${block.y}px;width:${block.width}px;height:${block.height}px;"></div>`;
-            }
-        }
-        if (vis.illustration) {
-            for (const ill of data.illustrations) {
-                textHtml += `<div class="illustration" style="left:${ill.x}px;top:${ill.y}px;width:${ill.width}px;height:${ill.height}px;"></div>`;
-            }
-        }
-        if (vis.textLine) {
-            for (const line of data.lines) {
-                textHtml += `<div class="text-line" style="left:${line.x}px;top:${line.y}px;width:${line.width}px;height:${line.height}px;"></div>`;
-            }
-        }
-        for (const box of data.boxes) {
-            const fontSize = Math.max(8, Math.floor(box.height * 0.7));
-            const borderStyle = vis.string ? '1px dashed blue' : 'none';
-            textHtml += `<div class="text-box" style="left:${box.x}px;top:${box.y}px;width:${box.width}px;height:${box.height}px;font-size:${fontSize}px;border:${borderStyle};">${escapeHtml(box.content)}</div>`;
-        }
-        rightOverlay.innerHTML = textHtml;
-    }
+    // Update both panes
+    drawOutlines();
+    renderRightOverlay();
 
     // Restore scroll positions
     requestAnimationFrame(() => {
@@ -108,6 +61,78 @@ function updateOverlays() {
     });
 }
 
+// Box outlines: [page data key, visibility flag, color, line width], drawn in order
+const OUTLINE_STYLES = [
+    ['composed_blocks', 'composedBlock', 'orange', 2],
+    ['illustrations', 'illustration', 'magenta', 3],
+    ['lines', 'textLine', 'green', 2],
+    ['boxes', 'string', 'blue', 2],
+];
+// The right pane draws thinner String outlines under its text
+const RIGHT_OUTLINE_STYLES = [...OUTLINE_STYLES.slice(0, 3), ['boxes', 'string', 'blue', 1]];
+
+// Draw box outlines onto a pane's canvas, which covers only the visible part of the page.
+// One canvas stroke per kind replaces thousands of positioned elements, and keeping it
+// viewport-sized stays within browser canvas limits at high zoom.
+function drawPanelOutlines(panel, styles, dashed) {
+    const canvas = panel.querySelector('.box-outlines');
+    if (!canvas || !cachedPageData) return;
+    const data = cachedPageData;
+    const vis = getVisibilityParams();
+
+    const left = panel.scrollLeft;
+    const top = panel.scrollTop;
+    const width = Math.max(0, Math.min(panel.clientWidth, data.display_width - left));
+    const height = Math.max(0, Math.min(panel.clientHeight, data.display_height - top));
+    const ratio = window.devicePixelRatio || 1;
+    canvas.style.left = `${left}px`;
+    canvas.style.top = `${top}px`;
+    canvas.style.width = `${width}px`;
+    canvas.style.height = `${height}px`;
+    canvas.width = Math.round(width * ratio);
+    canvas.height = Math.round(height * ratio);
+
+    const ctx = canvas.getContext('2d');
+    ctx.setTransform(ratio, 0, 0, ratio, -left * ratio, -top * ratio);
+    const right = left + width;
+    const bottom = top + height;
+    for (const [key, flag, color, lineWidth] of styles) {
+        if (!vis[flag]) continue;
+        const { x, y, width: w, height: h } = data[key];
+        const inset = lineWidth / 2;
+        ctx.strokeStyle = color;
+        ctx.lineWidth = lineWidth;
+        ctx.setLineDash(dashed ? [lineWidth * 3, lineWidth * 3] : []);
+        ctx.beginPath();
+        for (let i = 0; i < x.length; i++) {
+            if (x[i] > right || y[i] > bottom || x[i] + w[i] < left || y[i] + h[i] < top) continue;
+            // Stroke inside the box, like a border on a border-box element
+            ctx.rect(x[i] + inset, y[i] + inset, w[i] - lineWidth, h[i] - lineWidth);
+        }
+        ctx.stroke();
+    }
+}
+
+// Solid outlines over the image on the left, dashed ones under the text on the right
+function drawOutlines() {
+    drawPanelOutlines(leftPanel, OUTLINE_STYLES, false);
+    drawPanelOutlines(rightPanel, RIGHT_OUTLINE_STYLES, true);
+}
+
+// Redraw the outlines at most once per frame while scrolling or resizing
+let outlineFrame = 0;
+function scheduleOutlines() {
+    if (outlineFrame) return;
+    outlineFrame = requestAnimationFrame(() => {
+        outlineFrame = 0;
+        drawOutlines();
+    });
+}
+
+leftPanel.addEventListener('scroll', scheduleOutlines);
+rightPanel.addEventListener('scroll', scheduleOutlines);
+window.addEventListener('resize', scheduleOutlines);
+
 // Synchronized scrolling
 let syncing = false;
 
@@ -144,125 +169,56 @@ async function loadPage(index, restoreScroll = null) {
     leftPanel.innerHTML = '<div class="loading">Loading...</div>';
     rightPanel.innerHTML = '<div class="loading">Loading...</div>';
 
+    // Request the image right away, so the server renders it while the page data loads
+    const img = new Image();
+    img.alt = 'Page image';
+    img.style.display = 'none';
+    // Show image when loaded and sync scroll with right pane
+    img.onload = () => {
+        if (index !== currentIndex) return;
+        // Only this image's own container; an earlier page's image may still finish loading
+        img.parentElement?.querySelector('.loading')?.remove();
+        img.style.display = 'block';
+        // Sync left pane scroll to match right pane
+        leftPanel.scrollTop = rightPanel.scrollTop;
+        leftPanel.scrollLeft = rightPanel.scrollLeft;
+    };
+    img.src = `/api/image/${index}?zoom=${zoomLevel}`;
+
     try {
         // Get page data
-        const vis = getVisibilityParams();
-        const response = await fetch(`/api/page/${index}?zoom=${zoomLevel}`);
-        const data = await response.json();
-
-        if (data.error) {
-            leftPanel.innerHTML = `<div class="loading">${data.error}</div>`;
-            rightPanel.innerHTML = `<div class="loading">${data.error}</div>`;
+        const raw = await rawPage(index);
+        // The user may have moved on while this page's data was loading
+        if (index !== currentIndex) return;
+        if (raw.error) {
+            leftPanel.innerHTML = `<div class="loading">${raw.error}</div>`;
+            rightPanel.innerHTML = `<div class="loading">${raw.error}</div>`;
             return;
         }
 
+        const data = scalePage(raw, zoomLevel);
         cachedPageData = data;
         totalPages = data.total_pages;
         document.getElementById('pageInfo').textContent =
             `Page ${currentIndex + 1} of ${totalPages}: ${data.filename}`;
 
-        // Load left panel (image with overlay boxes)
-        let leftHtml = `
-            <div class="canvas-container" style="position: relative;">
-                <div class="loading" id="imageLoading">Image is rendering...</div>
-                <img src="/api/image/${index}?zoom=${zoomLevel}" alt="Page image" style="display:none">
-                <div class="left-overlay" style="width: ${data.display_width}px; height: ${data.display_height}px;">
+        // Load left panel (image with overlay boxes drawn on a canvas)
+        const imageLoading = img.complete ? '' : '<div class="loading">Image is rendering...</div>';
+        leftPanel.innerHTML = `
+            <div class="canvas-container" style="width: ${data.display_width}px; height: ${data.display_height}px;">
+                ${imageLoading}
+                <canvas class="box-outlines"></canvas>
+            </div>
         `;
-        // ComposedBlock boxes (orange solid)
-        if (vis.composedBlock) {
-            for (const block of data.composed_blocks) {
-                leftHtml += `<div class="left-composed-block" style="left:${block.x}px;top:${block.y}px;width:${block.width}px;height:${block.height}px;"></div>`;
-            }
-        }
-        // Illustration boxes (magenta solid)
-        if (vis.illustration) {
-            for (const ill of data.illustrations) {
-                leftHtml += `<div class="left-illustration" style="left:${ill.x}px;top:${ill.y}px;width:${ill.width}px;height:${ill.height}px;"></div>`;
-            }
-        }
-        // TextLine boxes (green solid)
-        if (vis.textLine) {
-            for (const line of data.lines) {
-                leftHtml += `<div class="left-text-line" style="left:${line.x}px;top:${line.y}px;width:${line.width}px;height:${line.height}px;"></div>`;
-            }
-        }
-        // String boxes (blue solid)
-        if (vis.string) {
-            for (const box of data.boxes) {
-                leftHtml += `<div class="left-string" style="left:${box.x}px;top:${box.y}px;width:${box.width}px;height:${box.height}px;"></div>`;
-            }
-        }
-        leftHtml += '</div></div>';
-        leftPanel.innerHTML = leftHtml;
-
-        // Show image when loaded and sync scroll with right pane
-        const img = leftPanel.querySelector('img');
-        img.onload = () => {
-            document.getElementById('imageLoading').style.display = 'none';
-            img.style.display = 'block';
-            // Sync left pane scroll to match right pane
-            leftPanel.scrollTop = rightPanel.scrollTop;
-            leftPanel.scrollLeft = rightPanel.scrollLeft;
-        };
+        leftPanel.querySelector('.box-outlines').before(img);
 
         // Load right panel (all bounding boxes)
-        let textHtml = `<div class="text-overlay" style="width: ${data.display_width}px; height: ${data.display_height}px; position: relative;">`;
-        // Draw ComposedBlock boxes first (orange dashed, background)
-        if (vis.composedBlock) {
-            for (const block of data.composed_blocks) {
-                textHtml += `
-                    <div class="composed-block" style="
-                        left: ${block.x}px;
-                        top: ${block.y}px;
-                        width: ${block.width}px;
-                        height: ${block.height}px;
-                    "></div>
-                `;
-            }
-        }
-        // Draw Illustration boxes (magenta)
-        if (vis.illustration) {
-            for (const ill of data.illustrations) {
-                textHtml += `
-                    <div class="illustration" style="
-                        left: ${ill.x}px;
-                        top: ${ill.y}px;
-                        width: ${ill.width}px;
-                        height: ${ill.height}px;
-                    "></div>
-                `;
-            }
-        }
-        // Draw TextLine boxes (green)
-        if (vis.textLine) {
-            for (const line of data.lines) {
-                textHtml += `
-                    <div class="text-line" style="
-                        left: ${line.x}px;
-                        top: ${line.y}px;
-                        width: ${line.width}px;
-                        height: ${line.height}px;
-                    "></div>
-                `;
-            }
-        }
-        // Draw String boxes on top (blue) - always show text, border is optional
-        for (const box of data.boxes) {
-            const fontSize = Math.max(8, Math.floor(box.height * 0.7));
-            const borderStyle = vis.string ? '1px dashed blue' : 'none';
-            textHtml += `
-                <div class="text-box" style="
-                    left: ${box.x}px;
-                    top: ${box.y}px;
-                    width: ${box.width}px;
-                    height: ${box.height}px;
-                    font-size: ${fontSize}px;
-                    border: ${borderStyle};
-                ">${escapeHtml(box.content)}</div>
-            `;
-        }
-        textHtml += '</div>';
-        rightPanel.innerHTML = textHtml;
+        rightPanel.innerHTML = `
+            <canvas class="box-outlines"></canvas>
+            <div class="text-overlay" style="width: ${data.display_width}px; height: ${data.display_height}px; position: relative;"></div>
+        `;
+        drawOutlines();
+        renderRightOverlay();
 
         // Restore scroll position after right pane renders (it's faster than image)
         if (restoreScroll) {
@@ -271,24 +227,167 @@ async function loadPage(index, restoreScroll = null) {
                 const maxScrollY = rightPanel.scrollHeight - rightPanel.clientHeight;
                 rightPanel.scrollLeft = restoreScroll.scrollXPercent * maxScrollX;
                 rightPanel.scrollTop = restoreScroll.scrollYPercent * maxScrollY;
+                renderRightOverlay();
             });
         }
 
+        prefetchPage(index + navigationStep);
+
     } catch (err) {
+        if (index !== currentIndex) return;
         leftPanel.innerHTML = `<div class="loading">Error: ${err.message}</div>`;
         rightPanel.innerHTML = `<div class="loading">Error: ${err.message}</div>`;
     }
 }
 
-function escapeHtml(text) {
-    const div = document.createElement('div');
-    div.textContent = text;
-    return div.innerHTML;
+// Element kinds in the order the binary page payload stores their columns
+const PAGE_KINDS = ['boxes', 'lines', 'illustrations', 'composed_blocks'];
+
+// Fetch a page's unscaled data from the binary endpoint. The coordinate columns are
+// Int32Array views straight onto the response, so no numbers are parsed.
+// Page data from rawPages, fetching it once; failed fetches are forgotten so they can be retried
+function rawPage(index) {
+    let pending = rawPages.get(index);
+    if (!pending) {
+        pending = fetchRawPage(index).then(raw => {
+            if (raw.error) rawPages.delete(index);
+            return raw;
+        }, err => {
+            rawPages.delete(index);
+            throw err;
+        });
+        rawPages.set(index, pending);
+    }
+    return pending;
+}
+
+async function fetchRawPage(index) {
+    const response = await fetch(`/api/page_bin/${index}`);
+    if (!response.ok) return response.json();
+    const buffer = await response.arrayBuffer();
+
+    // uint32 header length, JSON header, padding to 4 bytes, then int32 columns
+    const headerLength = new DataView(buffer).getUint32(0, true);
+    const raw = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+    let offset = (4 + headerLength + 3) & ~3;
+    for (const kind of PAGE_KINDS) {
+        const columns = raw[kind];
+        const count = columns.count;
+        delete columns.count;
+        for (const key of ['x', 'y', 'width', 'height']) {
+            columns[key] = new Int32Array(buffer, offset, count);
+            offset += count * 4;
+        }
+        // Labels arrive once each, with a column of indices into them
+        for (const [key, strings] of Object.entries(columns)) {
+            if (!Array.isArray(strings)) continue;
+            const indices = new Int32Array(buffer, offset, count);
+            offset += count * 4;
+            columns[key] = Array.from(indices, i => strings[i]);
+        }
+    }
+    return raw;
+}
+
+// Scale a page's ALTO-unit boxes to display pixels at a zoom level.
+// Mirrors the server's image scaling, truncating like its integer conversion.
+function scalePage(raw, zoom) {
+    const baseScale = Math.min(3200 / raw.image_width, 3200 / raw.image_height, 4.0);
+    const imgScale = baseScale * (zoom / 100);
+    // ALTO units to display pixels in one factor per axis
+    const scaleX = (raw.image_width / raw.page_width) * imgScale;
+    const scaleY = (raw.image_height / raw.page_height) * imgScale;
+
+    const scaleColumns = (columns) => {
+        const scaled = { ...columns };
+        for (const [key, scale] of [['x', scaleX], ['y', scaleY], ['width', scaleX], ['height', scaleY]]) {
+            const source = columns[key];
+            const out = new Int32Array(source.length);
+            for (let i = 0; i < source.length; i++) out[i] = source[i] * scale;
+            scaled[key] = out;
+        }
+        return scaled;
+    };
+
+    return {
+        filename: raw.filename,
+        total_pages: raw.total_pages,
+        display_width: Math.trunc(raw.image_width * imgScale),
+        display_height: Math.trunc(raw.image_height * imgScale),
+        boxes: scaleColumns(raw.boxes),
+        lines: scaleColumns(raw.lines),
+        illustrations: scaleColumns(raw.illustrations),
+        composed_blocks: scaleColumns(raw.composed_blocks),
+    };
+}
+
+// Right pane text element, cloned per box so no HTML is parsed
+const TEXT_BOX_TEMPLATE = document.createElement('div');
+TEXT_BOX_TEMPLATE.className = 'text-box';
+
+// Build the right pane's String text within a region as a fragment of cloned elements,
+// inserted in one operation. All outlines are drawn on the pane's canvas.
+function rightOverlayFragment(data, region) {
+    const fragment = document.createDocumentFragment();
+    const { x, y, width, height, content } = data.boxes;
+    for (let i = 0; i < x.length; i++) {
+        if (x[i] > region.right || y[i] > region.bottom || x[i] + width[i] < region.left || y[i] + height[i] < region.top) continue;
+        const div = TEXT_BOX_TEMPLATE.cloneNode(false);
+        const fontSize = Math.max(8, Math.floor(height[i] * 0.7));
+        div.style.cssText = `left:${x[i]}px;top:${y[i]}px;width:${width[i]}px;height:${height[i]}px;font-size:${fontSize}px;`;
+        div.textContent = content[i];
+        fragment.appendChild(div);
+    }
+    return fragment;
+}
+
+// Part of the page the right pane's boxes were built for, in display pixels
+let renderedRegion = null;
+
+// The visible part of the right pane, grown by margin times its size on every side
+function rightPanelRegion(margin) {
+    const marginX = rightPanel.clientWidth * margin;
+    const marginY = rightPanel.clientHeight * margin;
+    return {
+        left: rightPanel.scrollLeft - marginX,
+        top: rightPanel.scrollTop - marginY,
+        right: rightPanel.scrollLeft + rightPanel.clientWidth + marginX,
+        bottom: rightPanel.scrollTop + rightPanel.clientHeight + marginY,
+    };
+}
+
+// Only boxes near the visible area get elements, so zoomed-in pages stay light.
+// A screen's worth of margin on each side lets scrolling continue without rebuilding.
+function renderRightOverlay() {
+    const overlay = rightPanel.querySelector('.text-overlay');
+    if (!overlay || !cachedPageData) return;
+    renderedRegion = rightPanelRegion(1);
+    overlay.replaceChildren(rightOverlayFragment(cachedPageData, renderedRegion));
+}
+
+// Rebuild the right pane boxes once scrolling reaches the edge of the built region
+let rightOverlayTimer = 0;
+rightPanel.addEventListener('scroll', () => {
+    const visible = rightPanelRegion(0);
+    if (visible.left >= renderedRegion?.left && visible.top >= renderedRegion.top
+        && visible.right <= renderedRegion.right && visible.bottom <= renderedRegion.bottom) return;
+    clearTimeout(rightOverlayTimer);
+    rightOverlayTimer = setTimeout(renderRightOverlay, 100);
+});
+window.addEventListener('resize', renderRightOverlay);
+
+// Fetch a neighbouring page's data and image at the current zoom while the user reads this one.
+// The data is kept in rawPages; the image lands in the browser and server render caches.
+function prefetchPage(index) {
+    if (index < 0 || index >= totalPages) return;
+    rawPage(index).catch(() => {});
+    new Image().src = `/api/image/${index}?zoom=${zoomLevel}`;
 }
 
 function navigate(delta) {
     const newIndex = currentIndex + delta;
     if (newIndex >= 0 && newIndex < totalPages) {
+        navigationStep = delta;
         loadPage(newIndex);
     }
 }
@@ -1,10 +1,28 @@
 #!/usr/bin/env python3
 """Simple script to unpack tar files in the newspaper archive directory."""
 
+import os
 import tarfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 UNPACKED_DIR = Path("unpacked")
+READ_BUFFER_SIZE = 4 << 20
+
+
+def _extract_one(job: tuple[Path, Path]) -> tuple[Path, Path]:
+    """Extract one tar file into its target directory."""
+    tar_path, extract_dir = job
+    extract_dir.mkdir(parents=True, exist_ok=True)
+    # Read sequentially in large chunks; stream mode never seeks back to build a member index
+    with (
+        open(tar_path, "rb", buffering=READ_BUFFER_SIZE) as f,
+        tarfile.open(fileobj=f, mode="r|", bufsize=READ_BUFFER_SIZE) as tar,
+    ):
+        # The "data" filter rejects unsafe paths and links and clears ownership and special
+        # permission bits; member mtimes are still restored from the archive
+        tar.extractall(path=extract_dir, filter="data")
+    return tar_path, extract_dir
 
 
 def unpack_directory(source_dir: str):
@@ -23,18 +41,15 @@ def unpack_directory(source_dir: str):
 
     print(f"Found {len(tar_files)} tar file(s)")
 
-    for tar_path in tar_files:
-        # Mirror the source directory structure under UNPACKED_DIR
-        relative_path = tar_path.parent.relative_to(source_path.parent)
-        extract_dir = UNPACKED_DIR / relative_path
-        extract_dir.mkdir(parents=True, exist_ok=True)
-
-        print(f"Extracting: {tar_path.name} -> {extract_dir}")
+    # Mirror the source directory structure under UNPACKED_DIR
+    jobs = [(tar_path, UNPACKED_DIR / tar_path.parent.relative_to(source_path.parent)) for tar_path in tar_files]
 
-        with tarfile.open(tar_path, "r") as tar:
-            tar.extractall(path=extract_dir)
+    # Archives are independent, so extract them concurrently
+    with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+        for tar_path, extract_dir in executor.map(_extract_one, jobs):
+            print(f"Extracted: {tar_path.name} -> {extract_dir}")
 
-        print("  Done!")
+    print("Done!")
 
 
 if __name__ == "__main__":